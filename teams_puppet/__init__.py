@@ -2,11 +2,21 @@
 Name: teams_puppet
 Description: A Python package for getting Teams JSON Web Tokens (JWT) using a headless browser.
 """
-import json
+import copy
 import datetime
+import hashlib
+import json
+import os
+import threading
+import weakref
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from selenium.common.exceptions import ( TimeoutException )
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    SessionNotCreatedException,
+    StaleElementReferenceException,
+    TimeoutException
+)
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
@@ -18,20 +28,98 @@ options = webdriver.ChromeOptions()
 options.add_argument("--log-level=3")
 options.add_argument("--start-maximized")
 options.add_argument("--headless=new")
+options.add_argument("--disable-dev-shm-usage")
+options.add_argument("--disable-extensions")
 options.add_experimental_option('excludeSwitches', ['enable-logging'])
+# Only requests and localStorage matter, so skip downloading images
+options.add_experimental_option('prefs', {"profile.managed_default_content_settings.images": 2})
+# Return from driver.get once the DOM is ready; everything after it uses explicit waits
+options.page_load_strategy = 'eager'
+
+_TEAMS_KEY_SUFFIX = 'https://outlook.office.com//.default--'
+_LOKI_KEY_SUFFIX = 'https://loki.delve.office.com//.default--'
+_SIGN_IN_HOSTS = ('login.microsoftonline.com', 'login.microsoft.com', 'login.live.com')
+
+_EMAIL_LOC = (By.XPATH, "//input[@type='email']")
+_NEXT_LOC = (By.XPATH, "//input[@value='Next']")
+_PWD_LOC = (By.XPATH, "//input[contains(@placeholder, 'Password')]")
+_SIGNIN_LOC = (By.XPATH, "//button[contains(text(),'Sign in')] | //input[@value='Sign in']")
+_SIGNIN_RESULT_LOC = (
+    By.XPATH,
+    """
+    //*[contains(text(), 'Stay signed in?') 
+    or contains(text(), 'Sign-in is blocked') 
+    or contains(text(), 'password is incorrect')]
+    """
+)
+_YES_LOC = (By.XPATH, ".//input[@value='Yes']")
+_CHAT_LOC = (By.XPATH, "//button[@aria-label='Chat']")
+_PROFILE_LOC = (By.XPATH, "//span[contains(text(), '(You)')]/ancestor::li[@aria-haspopup='dialog']")
+_CONTACT_INFO_LOC = (By.XPATH, "//*[contains(text(), 'Contact information')]")
 
-def click_element_by_xpath(driver, xpath, timeout=30, method='click'):
+def click_element(driver, locator, timeout=30, method='click'):
     """
-    Helper function for selenium to click an element by its XPath.
+    Helper function for selenium to click an element by its locator.
     Finds element twice to avoid StaleElementReferenceException.
     """
     WebDriverWait(driver, timeout).until(
-        EC.element_to_be_clickable((By.XPATH, xpath))
+        EC.element_to_be_clickable(locator)
     )
     if method == 'click':
-        driver.find_element(By.XPATH, xpath).click()
+        driver.find_element(*locator).click()
     elif method == 'script':
-        driver.execute_script("arguments[0].click();", driver.find_element(By.XPATH, xpath))
+        driver.execute_script("arguments[0].click();", driver.find_element(*locator))
+
+def click_element_by_xpath(driver, xpath, timeout=30, method='click'):
+    """
+    Helper function for selenium to click an element by its XPath.
+    Finds element twice to avoid StaleElementReferenceException.
+    """
+    click_element(driver, (By.XPATH, xpath), timeout, method)
+
+_READ_TOKENS_SCRIPT = """
+let teams = null, loki = null;
+for (const key of Object.keys(window.localStorage)) {
+    const lower = key.toLowerCase();
+    if (lower.endsWith(arguments[0])) {
+        teams = window.localStorage.getItem(key);
+    } else if (lower.endsWith(arguments[1])) {
+        loki = window.localStorage.getItem(key);
+    }
+}
+return [teams, loki];
+"""
+
+def _read_tokens(driver):
+    """
+    Reads the Teams and Loki token entries from localStorage in a single script call.
+    """
+    return driver.execute_script(_READ_TOKENS_SCRIPT, _TEAMS_KEY_SUFFIX, _LOKI_KEY_SUFFIX)
+
+def _tokens_stored(driver):
+    """
+    Wait condition that returns both tokens once they are present in localStorage.
+    """
+    tokens = _read_tokens(driver)
+    return tokens if all(tokens) else False
+
+def _signin_result(driver):
+    """
+    Wait condition that returns the text of the sign-in outcome message once one is present.
+    Reads textContent inside the wait so hidden text still counts and stale reads are retried.
+    """
+    try:
+        return driver.find_element(*_SIGNIN_RESULT_LOC).get_attribute('textContent')
+    except (NoSuchElementException, StaleElementReferenceException):
+        return False
+
+def _left_sign_in(driver):
+    """
+    Wait condition that is true once the browser has left the Microsoft sign-in pages
+    and is back on whichever Teams host the tenant uses, where the tokens are stored.
+    """
+    hostname = driver.execute_script('return window.location.hostname;')
+    return bool(hostname) and hostname not in _SIGN_IN_HOSTS
 
 class AccountError(Exception):
     """Exception raised for errors in the account sign-in process."""
@@ -40,10 +128,112 @@ class AccountError(Exception):
         self.message = message
         super().__init__(self.message)
 
+def _parse_token_entry(raw_token):
+    """
+    Extracts only the fields we use from a raw localStorage token entry.
+    Malformed or missing entries are reported as an AccountError.
+    """
+    try:
+        entry = json.loads(raw_token)
+        expires_on = datetime.datetime.fromtimestamp(int(entry['expiresOn']))
+        return {'secret': entry['secret'], 'expiresOn': entry['expiresOn'], '_expires_on': expires_on}
+    except (TypeError, ValueError, KeyError) as e:
+        raise AccountError("Could not read a token from the browser session.") from e
+
+def _quit_quietly(driver):
+    """
+    Quits a Chrome WebDriver, ignoring any errors while quitting.
+    """
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+def _persistent_profile_dir(username):
+    """
+    Returns the Chrome profile directory for a user, inside a private per-user cache
+    directory. Returns None if that directory is not owned by the current user or is
+    accessible to others, since the profile holds the account's session cookies.
+    """
+    if os.name == 'nt':
+        cache_root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        cache_root = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    profiles_root = os.path.join(cache_root, 'teams_puppet')
+
+    try:
+        os.makedirs(profiles_root, mode=0o700, exist_ok=True)
+        if os.name != 'nt':
+            stat = os.stat(profiles_root)
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                return None
+    except OSError:
+        return None
+
+    return os.path.join(profiles_root, hashlib.sha1(username.encode()).hexdigest())
+
+_profiles_in_use = set()
+_profiles_lock = threading.Lock()
+
+def _claim_profile(profile_dir):
+    """
+    Claims a persistent Chrome profile for this process.
+    Returns False if another puppet in this process is already using it.
+    """
+    with _profiles_lock:
+        if profile_dir in _profiles_in_use:
+            return False
+        _profiles_in_use.add(profile_dir)
+        return True
+
+def _release_profile(profile_dir):
+    """
+    Releases a Chrome profile claimed with _claim_profile.
+    """
+    with _profiles_lock:
+        _profiles_in_use.discard(profile_dir)
+
+def _start_chrome(executable_path, profile_dir=None):
+    """
+    Starts Chrome with the given persistent profile directory, or with a
+    throwaway profile if none is given.
+    """
+    service = ChromeService(executable_path=executable_path)
+    driver_options = options
+    if profile_dir is not None:
+        driver_options = copy.deepcopy(options)
+        driver_options.add_argument(f"--user-data-dir={profile_dir}")
+        driver_options.add_argument("--profile-directory=Default")
+    return webdriver.Chrome(service=service, options=driver_options)
+
+def _cleanup(scheduler, drivers):
+    """
+    Shuts down a puppet's scheduler, quits its browsers and releases their profiles.
+    Takes the resources rather than the puppet so it can run as a weakref finalizer.
+    """
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    for driver, profile_dir in list(drivers.items()):
+        _quit_quietly(driver)
+        if profile_dir is not None:
+            _release_profile(profile_dir)
+    drivers.clear()
+
+def _call_weak(method_ref):
+    """
+    Calls a weakly referenced method if its object is still alive.
+    Used for scheduler jobs so a pending job does not keep the puppet alive.
+    """
+    method = method_ref()
+    if method is not None:
+        method()
+
 class Puppet:
     """
     A class to represent a Teams Puppet user, used to provide tokens for teams.
     """
+    _executable_path = None
+
     def __init__(self, username: str, password: str):
         """
         Initializes a new Teams Puppet user
@@ -57,46 +247,155 @@ class Puppet:
 
         self.scheduler = BackgroundScheduler()
         self.scheduler.start()
-        self._schedule_token_refresh()
 
         self.teams_token = None
         self.loki_token = None
+        self._token_cache = {}
+        self._teams_exp = None
+        self._loki_exp = None
+
+        self._driver = None
+        self._drivers = {}
+        self._driver_lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._signed_in = False
+        self._closed = False
+        self._refresh_error = None
+        self._retry_delay = None
+
+        self._finalizer = weakref.finalize(self, _cleanup, self.scheduler, self._drivers)
+
+        self.refresh_tokens()
+
 
-        self.teams_token, self.loki_token = self.fetch_new_tokens()
+    def __enter__(self):
+        """
+        Returns the puppet for use in a with statement.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Closes the puppet when leaving a with statement.
+        """
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the scheduler and the browser. Also runs automatically when
+        the puppet is garbage collected or the interpreter exits.
+        The puppet cannot fetch tokens once closed.
+        """
+        self._closed = True
+        self._finalizer()
+        self._driver = None
+        self._signed_in = False
 
+    def _check_open(self):
+        """
+        Raises a RuntimeError if the puppet has been closed.
+        """
+        if self._closed:
+            raise RuntimeError(f"The puppet for user {self.username} has been closed.")
 
-    def __del__(self):
+    def _schedule_token_refresh(self, run_date=None):
         """
-        Destructor for the Puppet class. Shuts down the scheduler.
+        Schedules a single token refresh, by default 5 minutes before the first token
+        expires, replacing any refresh scheduled for the previous tokens.
         """
-        self.scheduler.shutdown()
+        if self._closed:
+            return
+
+        if run_date is None:
+            expires_on = min(self._teams_exp, self._loki_exp)
+            run_date = max(expires_on - datetime.timedelta(minutes=5), datetime.datetime.now())
+
+        # A one-off refresh is never caught up if skipped, so always run it however late
+        self.scheduler.add_job(
+            _call_weak,
+            'date',
+            args=[weakref.WeakMethod(self.refresh_tokens)],
+            run_date=run_date,
+            id='refresh_tokens',
+            replace_existing=True,
+            max_instances=1,
+            misfire_grace_time=None
+        )
 
-    def _schedule_token_refresh(self):
+    def _refresh_failed(self, error):
         """
-        Schedules a token refresh every 5 minutes.
+        Records a failed refresh and schedules another attempt, doubling the delay
+        after each consecutive failure from 1 minute up to 1 hour.
         """
-        self.scheduler.add_job(self.check_tokens, 'interval', minutes=5)
+        self._refresh_error = error
+        if self._retry_delay is None:
+            self._retry_delay = datetime.timedelta(minutes=1)
+        else:
+            self._retry_delay = min(self._retry_delay * 2, datetime.timedelta(hours=1))
+        self._schedule_token_refresh(datetime.datetime.now() + self._retry_delay)
 
     def check_tokens(self):
         """
         Checks the current token, fetching a new one if necessary.
         """
-        expiring_soon = datetime.timedelta(minutes=5)
+        self._maybe_refresh()
 
-        teams_token = json.loads(self.teams_token)
-        loki_token = json.loads(self.loki_token)
+    def _needs_refresh(self):
+        """
+        Returns True if either token expires within the next 5 minutes.
+        """
+        if self._teams_exp is None or self._loki_exp is None:
+            return True
 
-        teams_token_expiring_soon = self.time_til_expiration(teams_token) <= expiring_soon
-        loki_token_expiring_soon = self.time_til_expiration(loki_token) <= expiring_soon
+        refresh_after = datetime.datetime.now() + datetime.timedelta(minutes=5)
+        return min(self._teams_exp, self._loki_exp) <= refresh_after
 
-        if teams_token_expiring_soon or loki_token_expiring_soon:
-            self.refresh_tokens()
+    def _maybe_refresh(self):
+        """
+        Refreshes the tokens if they are expiring soon. Callers that arrive while
+        a refresh is running wait for it and then see the new tokens.
+        """
+        with self._refresh_lock:
+            if self._needs_refresh():
+                # Report the last failure rather than signing in again on every call
+                if self._refresh_error is not None:
+                    raise self._refresh_error
+                self.refresh_tokens()
 
     def refresh_tokens(self):
         """
         Refreshes the current tokens.
+        A failure is remembered and raised by get_token until a refresh succeeds.
+        Other errors are retried in the background with a growing delay, but a
+        rejected sign-in is not, as repeated bad sign-ins would lock the account out.
+        Call this directly to retry, for example after updating the password.
         """
-        self.teams_token, self.loki_token = self.fetch_new_tokens()
+        with self._refresh_lock:
+            try:
+                teams_token, loki_token = self.fetch_new_tokens()
+            except AccountError as e:
+                # Sign-in was rejected, retrying would only lock the account out
+                self._refresh_error = e
+                raise
+            except Exception as e:
+                self._refresh_failed(e)
+                raise
+
+            # Parse both before replacing anything, so a bad fetch keeps the current tokens
+            try:
+                teams_exp = _parse_token_entry(teams_token)['_expires_on']
+                loki_exp = _parse_token_entry(loki_token)['_expires_on']
+            except AccountError as e:
+                # The page did not provide a token, which is worth retrying
+                self._refresh_failed(e)
+                raise
+
+            self._refresh_error = None
+            self._retry_delay = None
+            self._token_cache.clear()
+            self.teams_token, self.loki_token = teams_token, loki_token
+            self._teams_exp, self._loki_exp = teams_exp, loki_exp
+            self._schedule_token_refresh()
 
     def get_token(self, service: str = "teams") -> str:
         """
@@ -104,20 +403,25 @@ class Puppet:
 
         :return: The current or new token for the specified service.
         """
-
-        expiring_soon = datetime.timedelta(minutes=5)
+        self._check_open()
+        self._maybe_refresh()
 
         if service == "teams":
-            teams_token = json.loads(self.teams_token)
-            if self.time_til_expiration(teams_token) <= expiring_soon:
-                self.refresh_tokens()
-            return teams_token['secret']
+            return self._parse_token(self.teams_token)['secret']
 
         if service == "loki":
-            loki_token = json.loads(self.loki_token)
-            if self.time_til_expiration(loki_token) <= expiring_soon:
-                self.refresh_tokens()
-            return loki_token['secret']
+            return self._parse_token(self.loki_token)['secret']
+
+    def _parse_token(self, raw_token):
+        """
+        Parses a raw token entry, caching the result keyed by the token string
+        so repeated checks do not re-parse the same token.
+        """
+        cached = self._token_cache.get(raw_token)
+        if cached is None:
+            cached = _parse_token_entry(raw_token)
+            self._token_cache[raw_token] = cached
+        return cached
 
     def time_til_expiration(self, json_token):
         """
@@ -126,124 +430,217 @@ class Puppet:
 
         if not json_token:
             return datetime.timedelta(0)
-        expires_on = datetime.datetime.fromtimestamp(int(json_token['expiresOn']))
+        expires_on = json_token.get('_expires_on')
+        if expires_on is None:
+            expires_on = datetime.datetime.fromtimestamp(int(json_token['expiresOn']))
         return expires_on - datetime.datetime.now()
 
     def fetch_new_tokens(self):
         """
         Fetches new tokens for the Teams and Loki services.
+        The browser session is kept between calls, so the sign-in flow only
+        runs on the first fetch or when the session has expired.
+        :return: The new tokens for the Teams and Loki services as a tuple.
+        """
+        with self._driver_lock:
+            self._check_open()
+            try:
+                return self._fetch_with_driver(self._get_driver())
+            except Exception:
+                # Don't keep a browser in an unknown state, start a fresh one next time
+                self._quit_driver()
+                raise
+
+    def _fetch_with_driver(self, driver):
+        """
+        Fetches new tokens using the given driver, signing in only if needed.
         :return: The new tokens for the Teams and Loki services as a tuple.
         """
-        auth_token, loki_token = None, None
+        tokens = None
+
+        if self._signed_in:
+            # Open the Teams origin to drop its cached access tokens, then reload
+            # so Teams has to issue new ones
+            driver.get("https://teams.microsoft.com")
+            self._clear_cached_tokens(driver)
+            driver.refresh()
+            try:
+                tokens = self._capture_tokens(driver)
+            except TimeoutException:
+                # The session has expired, sign in again below
+                self._signed_in = False
+
+        if tokens is None:
+            # Navigate to the Microsoft authentication link
+            driver.get("https://teams.microsoft.com")
+            self._login(driver)
+            self._signed_in = True
+
+            # The profile may hold access tokens from a previous run, drop them once back on Teams
+            WebDriverWait(driver, 30).until(_left_sign_in)
+            self._clear_cached_tokens(driver)
+            driver.refresh()
 
-        # Initialize Chrome WebDriver
-        executable_path = ChromeDriverManager().install()
-        service = ChromeService(executable_path=executable_path)
-        driver = webdriver.Chrome(service=service, options=options)
+            tokens = self._capture_tokens(driver)
 
-        # Navigate to the Microsoft authentication link
-        driver.get("https://teams.microsoft.com")
+        # Leave Teams so the web app does not keep running between refreshes
+        driver.get("about:blank")
+
+        return tokens
+
+    def _get_driver(self):
+        """
+        Returns the Chrome WebDriver for this puppet, starting it if needed.
+        """
+        if self._driver is None:
+            # Resolve the chromedriver binary once per process
+            if Puppet._executable_path is None:
+                Puppet._executable_path = ChromeDriverManager().install()
+
+            # Keep a browser profile per user so cookies survive between runs. If it is
+            # unsafe to use, or another puppet or process is using it, fall back to a
+            # throwaway profile.
+            profile_dir = _persistent_profile_dir(self.username)
+            if profile_dir is not None and not _claim_profile(profile_dir):
+                profile_dir = None
 
-        # Wait for the input box with placeholder containing 'email' to be present
-        email_input = WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((
-                By.XPATH,
-                "//input[@type='email']"
-            ))
+            try:
+                driver = _start_chrome(Puppet._executable_path, profile_dir)
+            except SessionNotCreatedException:
+                if profile_dir is None:
+                    raise
+                # Chrome refuses a profile that another running instance holds
+                _release_profile(profile_dir)
+                profile_dir = None
+                driver = _start_chrome(Puppet._executable_path)
+            except Exception:
+                if profile_dir is not None:
+                    _release_profile(profile_dir)
+                raise
+
+            # close() may have run its finalizer while Chrome was starting
+            if self._closed:
+                _quit_quietly(driver)
+                if profile_dir is not None:
+                    _release_profile(profile_dir)
+                self._check_open()
+
+            self._driver = driver
+            self._drivers[driver] = profile_dir
+        return self._driver
+
+    def _quit_driver(self):
+        """
+        Quits the Chrome WebDriver if one is running. Errors while quitting are ignored.
+        """
+        driver, self._driver = self._driver, None
+        self._signed_in = False
+        if driver is not None:
+            profile_dir = self._drivers.pop(driver, None)
+            _quit_quietly(driver)
+            if profile_dir is not None:
+                _release_profile(profile_dir)
+
+    def _clear_cached_tokens(self, driver):
+        """
+        Removes the Teams and Loki access tokens from the browser's localStorage.
+        """
+        driver.execute_script(
+            """
+            for (const key of Object.keys(window.localStorage)) {
+                const lower = key.toLowerCase();
+                if (lower.endsWith(arguments[0]) || lower.endsWith(arguments[1])) {
+                    window.localStorage.removeItem(key);
+                }
+            }
+            """,
+            _TEAMS_KEY_SUFFIX,
+            _LOKI_KEY_SUFFIX
         )
-        email_input.send_keys(self.username)
 
-        click_element_by_xpath(
-            driver,
-            "//input[@value='Next']"
+    def _login(self, driver):
+        """
+        Runs the Microsoft sign-in flow on the current page, unless the browser
+        profile is already signed in.
+        """
+        # Wait for either the email input or, if the profile is already signed in, Teams itself
+        WebDriverWait(driver, 30).until(
+            EC.any_of(
+                EC.presence_of_element_located(_EMAIL_LOC),
+                EC.presence_of_element_located(_CHAT_LOC)
+            )
         )
+        email_inputs = driver.find_elements(*_EMAIL_LOC)
+        if not email_inputs:
+            return
+
+        email_inputs[0].send_keys(self.username)
+
+        click_element(driver, _NEXT_LOC)
 
         # Wait for the password input box with placeholder containing 'Password' to be present
         password_input = WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((
-                    By.XPATH,
-                    "//input[contains(@placeholder, 'Password')]"
-                ))
+            EC.presence_of_element_located(_PWD_LOC)
         )
         password_input.send_keys(self.password)
 
-        click_element_by_xpath(
-            driver,
-            "//button[contains(text(),'Sign in')] | //input[@value='Sign in']"
-        )
+        click_element(driver, _SIGNIN_LOC)
 
         try:
-            WebDriverWait(driver, 30).until(
-                lambda driver: driver.find_element(
-                    By.XPATH,
-                    """
-                    //*[contains(text(), 'Stay signed in?') 
-                    or contains(text(), 'Sign-in is blocked') 
-                    or contains(text(), 'password is incorrect')]
-                    """
-                )
-            )
+            # Branch on the message text the wait read instead of querying again
+            result_text = WebDriverWait(driver, 30).until(_signin_result)
 
-            if driver.find_elements(
-                By.XPATH,
-                "//*[contains(text(), 'Stay signed in?')]"
-            ):
-                click_element_by_xpath(driver, ".//input[@value='Yes']")
+            if 'Stay signed in?' in result_text:
+                click_element(driver, _YES_LOC)
 
-            if driver.find_elements(
-                By.XPATH,
-                "//*[contains(text(), 'Sign-in is blocked')]"
-            ):
+            if 'Sign-in is blocked' in result_text:
                 raise AccountError((
                     "Sign-in is blocked. "
                     "Please try again later or reset account password "
                     f"for user {self.username}."
                 ))
 
-            if driver.find_elements(
-                By.XPATH,
-                "//*[contains(text(), 'Your account or password is incorrect.')]"
-            ):
+            if 'password is incorrect' in result_text:
                 raise AccountError(f"Invalid credentials for user {self.username}.")
 
 
         except TimeoutException:
             pass
 
+    def _capture_tokens(self, driver):
+        """
+        Reads both tokens from localStorage, opening the user's profile card to
+        make Teams request the Loki token if the page load did not.
+        :return: The tokens for the Teams and Loki services as a tuple.
+        """
+        # Teams usually requests both tokens while loading, so try without clicking first
+        try:
+            auth_token, loki_token = WebDriverWait(driver, 5, poll_frequency=0.1).until(_tokens_stored)
+            return auth_token, loki_token
+        except TimeoutException:
+            pass
+
         element_found = False
         attempts = 0
         while not element_found and attempts < 3:
-            click_element_by_xpath(
-                driver,
-                "//button[@aria-label='Chat']",
-                method='script'
-            )
-            click_element_by_xpath(
-                driver,
-                "//span[contains(text(), '(You)')]/ancestor::li[@aria-haspopup='dialog']",
-                method='script'
-            )
+            click_element(driver, _CHAT_LOC, method='script')
+            click_element(driver, _PROFILE_LOC, method='script')
             try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((
-                        By.XPATH,
-                        "//*[contains(text(), 'Contact information')]"
-                    ))
+                # Stop as soon as the card opens or the tokens are already stored
+                WebDriverWait(driver, 10, poll_frequency=0.1).until(
+                    EC.any_of(
+                        EC.presence_of_element_located(_CONTACT_INFO_LOC),
+                        _tokens_stored
+                    )
                 )
                 element_found = True
             except TimeoutException:
                 attempts += 1
 
-        driver.implicitly_wait(5)
-
-        all_keys = driver.execute_script('return Object.keys(window.localStorage);')
-
-        for key in all_keys:
-            if key.lower().endswith('https://loki.delve.office.com//.default--'):
-                loki_token = driver.execute_script(f'return window.localStorage.getItem("{key}");')
-            if key.lower().endswith('https://outlook.office.com//.default--'):
-                auth_token = driver.execute_script(f'return window.localStorage.getItem("{key}");')
-
-        driver.quit()
+        # Wait until Teams has written both tokens rather than sleeping a fixed time
+        try:
+            auth_token, loki_token = WebDriverWait(driver, 10, poll_frequency=0.1).until(_tokens_stored)
+        except TimeoutException:
+            auth_token, loki_token = _read_tokens(driver)
 
         return auth_token, loki_token